@@ -1,28 +1,43 @@
 """Configuration management for the Spotify TuneGenie updater."""
 
+import base64
+import copy
+import functools
 import json
 import os
 import sys
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 CONFIG_FILE = "config.json"
 
+# Access tokens are valid for an hour, so consecutive runs reuse the last one instead of refreshing
+TOKEN_CACHE_FILE = ".spotify_token_cache.json"
+
 
 def load_config() -> Dict[str, Any]:
-    """Load configuration from JSON file."""
-    if not os.path.exists(CONFIG_FILE):
+    """Load configuration from JSON file.
+
+    The file is parsed once per process; each caller gets its own copy, so changing it
+    can't corrupt the memoized configuration.
+    """
+    return copy.deepcopy(_read_config())
+
+
+@functools.lru_cache(maxsize=1)
+def _read_config() -> Dict[str, Any]:
+    """Parse the configuration file (once per process)."""
+    try:
+        with open(CONFIG_FILE, 'r') as f:
+            config = json.load(f)
+            return config
+    except FileNotFoundError:
         print(f"ERROR: Configuration file '{CONFIG_FILE}' not found.")
         print("\nTo set up:")
         print("1. Copy 'config.json.template' to 'config.json'")
         print("2. Fill in your credentials")
         print("3. Run the script again")
         sys.exit(1)
-
-    try:
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
-            return config
     except json.JSONDecodeError as e:
         print(f"ERROR: Invalid JSON in {CONFIG_FILE}: {e}")
         sys.exit(1)
@@ -36,12 +51,24 @@ def save_config(config: Dict[str, Any]) -> bool:
     try:
         with open(CONFIG_FILE, 'w') as f:
             json.dump(config, f, indent=4)
+        _read_config.cache_clear()
+        get_spotify_basic_auth.cache_clear()
+        # A token cached under the old credentials must not outlive them
+        clear_spotify_token_cache()
         return True
     except Exception as e:
         print(f"ERROR: Failed to save {CONFIG_FILE}: {e}")
         return False
 
 
+def clear_spotify_token_cache():
+    """Delete the cached Spotify access token so the next run requests a new one."""
+    try:
+        os.remove(TOKEN_CACHE_FILE)
+    except FileNotFoundError:
+        pass
+
+
 def get_spotify_config() -> Dict[str, str]:
     """Get Spotify configuration values."""
     config = load_config()
@@ -51,10 +78,39 @@ def get_spotify_config() -> Dict[str, str]:
         'refresh_token': config['spotify']['refresh_token'],
         'daily_playlist_id': config['spotify']['daily_playlist_id'],
         'cumulative_playlist_id': config['spotify'].get('cumulative_playlist_id', ''),
-        'max_cumulative_tracks': config['spotify'].get('max_cumulative_tracks', 9000)
+        'max_cumulative_tracks': config['spotify'].get('max_cumulative_tracks', 9000),
+        'search_concurrency': _positive_setting(config['spotify'], 'search_concurrency', 10, int),
+        'requests_per_second': _positive_setting(config['spotify'], 'requests_per_second', 10, float)
     }
 
 
+def _positive_setting(section: Dict[str, Any], key: str, default, cast):
+    """Read a setting that must be a positive number, falling back to the default (with a warning) otherwise."""
+    value = section.get(key, default)
+    try:
+        # Reject booleans too: they are ints to Python but never what the user meant
+        if not isinstance(value, bool) and cast(value) > 0:
+            return cast(value)
+    except (TypeError, ValueError):
+        pass
+    print(f"WARNING: '{key}' in {CONFIG_FILE} must be a positive number, got {value!r}; using {default}")
+    return default
+
+
+def get_unconfigured_spotify_keys(*keys: str) -> List[str]:
+    """Return the given Spotify config keys that still hold a "YOUR_..." template placeholder."""
+    spotify_config = get_spotify_config()
+    return [key for key in keys if "YOUR_" in spotify_config[key]]
+
+
+@functools.lru_cache(maxsize=1)
+def get_spotify_basic_auth() -> str:
+    """Get the Basic Authorization header value for the Spotify token endpoint (encoded once per process)."""
+    spotify_config = get_spotify_config()
+    client_creds = f"{spotify_config['client_id']}:{spotify_config['client_secret']}"
+    return f"Basic {base64.b64encode(client_creds.encode()).decode()}"
+
+
 def get_tunegenie_config() -> Dict[str, Any]:
     """Get TuneGenie configuration values."""
     config = load_config()
@@ -1,32 +1,299 @@
 """SQLite database management for caching track searches and playlist contents."""
 
+import atexit
 import sqlite3
 import os
+import string
+import threading
 from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
 
 
+# Conservative limit on bound parameters per statement (SQLITE_MAX_VARIABLE_NUMBER on older builds)
+MAX_SQL_VARIABLES = 999
+
+# Normalized artist/title key, stored only as an expression index on tracks. Queries must
+# use this exact expression for SQLite to pick the index.
+SEARCH_KEY_EXPR = "lower(trim(tunegenie_artist)) || '_' || lower(trim(tunegenie_title))"
+
+# SQLite's lower() only folds ASCII letters, so the Python side must not fold anything else
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+# Junction table for playlist-track relationships. The composite primary key is the only
+# identifier, so the table is clustered on it (WITHOUT ROWID) instead of carrying a rowid.
+PLAYLIST_TRACKS_DDL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        playlist_id TEXT,
+        tunegenie_id TEXT,
+        position INTEGER,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (playlist_id, tunegenie_id),
+        FOREIGN KEY (playlist_id) REFERENCES playlists (id),
+        FOREIGN KEY (tunegenie_id) REFERENCES tracks (tunegenie_id)
+    ) WITHOUT ROWID
+"""
+
+# Data-access statements. Repeated calls pass the exact same text, so the connection's
+# statement cache hands back the already-compiled program instead of re-parsing it.
+_SQL_UPSERT_PLAYLIST = """
+    INSERT INTO playlists (id, name, type, last_updated, track_count)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP,
+            (SELECT COUNT(*) FROM playlist_tracks WHERE playlist_id = ?))
+    ON CONFLICT (id) DO UPDATE SET
+        name = excluded.name,
+        type = excluded.type,
+        last_updated = excluded.last_updated
+"""
+
+# Most recent search for a song under any TuneGenie ID, preferring one that found a match
+_SQL_SELECT_CACHED_SEARCH_BY_NAME = f"""
+    SELECT tunegenie_id, spotify_uri FROM tracks
+    WHERE {SEARCH_KEY_EXPR} = lower(trim(?)) || '_' || lower(trim(?))
+    ORDER BY spotify_uri IS NULL, last_found DESC
+    LIMIT 1
+"""
+
+_SQL_TOUCH_TRACK = """
+    UPDATE tracks SET last_found = CURRENT_TIMESTAMP
+    WHERE tunegenie_id = ?
+"""
+
+# Rows holding a successful search for a song (artist and title bound as parameters)
+_SQL_MATCHED_TRACK_IDS_BY_NAME = f"""
+    SELECT tunegenie_id FROM tracks
+    WHERE {SEARCH_KEY_EXPR} = lower(trim(?)) || '_' || lower(trim(?)) AND spotify_uri IS NOT NULL
+"""
+
+# Before a song's matches are cleared, playlist entries pointing at them move to stub rows
+# for the same URIs, so trimming and the playlist cache still see those tracks
+_SQL_INSERT_STUBS_FOR_MATCHED_PLAYLIST_TRACKS = f"""
+    INSERT OR IGNORE INTO tracks (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri)
+    SELECT DISTINCT t.spotify_uri, '', '', t.spotify_uri
+    FROM tracks t
+    JOIN playlist_tracks pt ON pt.tunegenie_id = t.tunegenie_id
+    WHERE t.tunegenie_id IN ({_SQL_MATCHED_TRACK_IDS_BY_NAME})
+"""
+
+_SQL_MOVE_MATCHED_PLAYLIST_TRACKS_TO_STUBS = f"""
+    UPDATE OR IGNORE playlist_tracks
+    SET tunegenie_id = (SELECT spotify_uri FROM tracks WHERE tracks.tunegenie_id = playlist_tracks.tunegenie_id)
+    WHERE tunegenie_id IN ({_SQL_MATCHED_TRACK_IDS_BY_NAME})
+"""
+
+# Entries left behind because the playlist already held the stub are duplicates
+_SQL_DELETE_MATCHED_PLAYLIST_TRACKS = f"""
+    DELETE FROM playlist_tracks
+    WHERE tunegenie_id IN ({_SQL_MATCHED_TRACK_IDS_BY_NAME})
+"""
+
+# Turns every successful search for a song into a failed one, e.g. after Spotify pulled the track
+_SQL_CLEAR_CACHED_SEARCH_BY_NAME = f"""
+    UPDATE tracks
+    SET spotify_uri = NULL, spotify_artist = NULL, spotify_title = NULL, spotify_album = NULL
+    WHERE tunegenie_id IN ({_SQL_MATCHED_TRACK_IDS_BY_NAME})
+"""
+
+_SQL_INSERT_TRACK = """
+    INSERT OR REPLACE INTO tracks
+    (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri, spotify_artist,
+     spotify_title, spotify_album, created_at, last_found)
+    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+"""
+
+_SQL_SELECT_PLAYLIST_URIS = """
+    SELECT t.spotify_uri
+    FROM tracks t
+    JOIN playlist_tracks pt ON t.tunegenie_id = pt.tunegenie_id
+    WHERE pt.playlist_id = ? AND t.spotify_uri IS NOT NULL
+    ORDER BY pt.position
+"""
+
+# Candidates keep their input order; only those with no cached row in the playlist are returned
+_SQL_SELECT_URIS_NOT_IN_PLAYLIST = """
+    WITH candidates(row_num, spotify_uri) AS (VALUES {values})
+    SELECT candidates.spotify_uri
+    FROM candidates
+    WHERE NOT EXISTS (
+        SELECT 1
+        FROM tracks t
+        JOIN playlist_tracks pt ON pt.tunegenie_id = t.tunegenie_id
+        WHERE t.spotify_uri = candidates.spotify_uri AND pt.playlist_id = ?
+    )
+    ORDER BY candidates.row_num
+"""
+
+_SQL_DELETE_PLAYLIST_TRACKS = "DELETE FROM playlist_tracks WHERE playlist_id = ?"
+
+_SQL_INSERT_PLAYLIST_TRACK_BY_URI = """
+    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position)
+    SELECT ?, tunegenie_id, ?
+    FROM tracks
+    WHERE spotify_uri = ?
+"""
+
+# Playlist tracks this app never searched for (e.g. added by hand) get a stub row keyed by
+# their URI, so the playlist cache can still hold every track on the playlist
+_SQL_INSERT_STUB_TRACK = """
+    INSERT OR IGNORE INTO tracks (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri)
+    SELECT ?1, '', '', ?1
+    WHERE NOT EXISTS (SELECT 1 FROM tracks WHERE spotify_uri = ?1)
+"""
+
+_SQL_INSERT_PLAYLIST_TRACK_BY_URI_WITH_ADDED_AT = """
+    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position, added_at)
+    SELECT ?, tunegenie_id, ?, ?
+    FROM tracks
+    WHERE spotify_uri = ?
+"""
+
+# Positions continue after the playlist's current maximum, computed in the same statement
+_SQL_APPEND_PLAYLIST_TRACKS = """
+    WITH base(max_position) AS (
+        SELECT COALESCE(MAX(position), -1) FROM playlist_tracks WHERE playlist_id = ?
+    ),
+    new_tracks(row_num, tunegenie_id) AS (VALUES {values})
+    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position)
+    SELECT ?, new_tracks.tunegenie_id, base.max_position + new_tracks.row_num
+    FROM base, new_tracks
+"""
+
+# Same as above but resolving Spotify URIs through tracks; added_at uses Spotify's timestamp
+# format so newly added tracks sort correctly against synced ones when trimming
+_SQL_APPEND_PLAYLIST_TRACKS_BY_URI = """
+    WITH base(max_position) AS (
+        SELECT COALESCE(MAX(position), -1) FROM playlist_tracks WHERE playlist_id = ?
+    ),
+    new_tracks(row_num, spotify_uri) AS (VALUES {values})
+    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position, added_at)
+    SELECT ?, t.tunegenie_id, base.max_position + new_tracks.row_num, strftime('%Y-%m-%dT%H:%M:%SZ', 'now')
+    FROM base, new_tracks
+    JOIN tracks t ON t.spotify_uri = new_tracks.spotify_uri
+"""
+
+_SQL_SELECT_TRACK_BY = """
+    SELECT tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri,
+           spotify_artist, spotify_title, spotify_album
+    FROM tracks
+    WHERE {column} = ?
+"""
+_SQL_SELECT_TRACK_BY_URI = _SQL_SELECT_TRACK_BY.format(column="spotify_uri")
+_SQL_SELECT_TRACK_BY_TUNEGENIE_ID = _SQL_SELECT_TRACK_BY.format(column="tunegenie_id")
+
+_SQL_SELECT_PLAYLIST_TRACK_COUNT = "SELECT track_count FROM playlists WHERE id = ?"
+
+_SQL_SELECT_PLAYLIST_SNAPSHOT_ID = "SELECT snapshot_id FROM playlists WHERE id = ?"
+
+_SQL_UPDATE_PLAYLIST_SNAPSHOT_ID = "UPDATE playlists SET snapshot_id = ? WHERE id = ?"
+
+_SQL_COUNT_PLAYLIST_TRACKS = """
+    SELECT COUNT(*)
+    FROM playlist_tracks
+    WHERE playlist_id = ?
+"""
+
+_SQL_COUNT_CACHED_PLAYLIST_URIS = """
+    SELECT COUNT(DISTINCT t.spotify_uri)
+    FROM playlist_tracks pt
+    JOIN tracks t ON pt.tunegenie_id = t.tunegenie_id
+    WHERE pt.playlist_id = ?
+"""
+
+_SQL_SELECT_OLDEST_PLAYLIST_URIS = """
+    SELECT t.spotify_uri
+    FROM playlist_tracks pt
+    JOIN tracks t ON pt.tunegenie_id = t.tunegenie_id
+    WHERE pt.playlist_id = ? AND t.spotify_uri IS NOT NULL
+    ORDER BY pt.added_at ASC, pt.position ASC
+    LIMIT ?
+"""
+
+_SQL_DELETE_PLAYLIST_TRACKS_BY_URI = """
+    DELETE FROM playlist_tracks
+    WHERE playlist_id = ? AND tunegenie_id IN (
+        SELECT tunegenie_id FROM tracks WHERE spotify_uri IN ({placeholders})
+    )
+"""
+
+# Stub rows are not searches, so they are left out of the search counts
+_SQL_SELECT_CACHE_STATS = """
+    SELECT
+        COALESCE(SUM(CASE WHEN spotify_uri IS NOT NULL THEN 1 ELSE 0 END), 0),
+        COALESCE(SUM(CASE WHEN spotify_uri IS NULL THEN 1 ELSE 0 END), 0),
+        (SELECT COUNT(*) FROM playlists),
+        (SELECT COUNT(*) FROM playlist_tracks)
+    FROM tracks
+    WHERE tunegenie_id IS NOT spotify_uri
+"""
+
+_SQL_DELETE_STALE_FAILED_SEARCHES = """
+    DELETE FROM tracks
+    WHERE last_found < datetime('now', ?)
+    AND spotify_uri IS NULL
+"""
+
+_SQL_DELETE_UNUSED_STUB_TRACKS = """
+    DELETE FROM tracks
+    WHERE tunegenie_id = spotify_uri
+    AND NOT EXISTS (SELECT 1 FROM playlist_tracks pt WHERE pt.tunegenie_id = tracks.tunegenie_id)
+"""
+
+_SQL_SELECT_TRACKS_NEEDING_SEARCH = """
+    WITH requested(id) AS (VALUES {values})
+    SELECT requested.id, t.tunegenie_artist, t.tunegenie_title
+    FROM requested
+    LEFT JOIN tracks t ON t.tunegenie_id = requested.id
+    WHERE t.spotify_uri IS NULL
+"""
+
+
 class CacheDatabase:
     """Manages SQLite database for caching track searches and playlist contents."""
 
     def __init__(self, db_path: str = "cache.db"):
         self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = self._connect()
+        self._touched_track_ids = set()  # Cache hits whose last_found is bumped on flush
         self.init_database()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection tuning PRAGMAs applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=512)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
 
     def init_database(self):
         """Initialize database with required tables."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
 
+            # WAL mode persists in the database file once set
+            cursor.execute("PRAGMA journal_mode=WAL")
+
             # Playlists table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS playlists (
                     id TEXT PRIMARY KEY,
                     name TEXT NOT NULL,
                     type TEXT NOT NULL,  -- 'daily' or 'cumulative'
-                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    track_count INTEGER NOT NULL DEFAULT 0,  -- maintained by playlist_tracks triggers
+                    snapshot_id TEXT  -- Spotify playlist version the cached tracks match
                 )
             """)
+            cursor.execute("PRAGMA table_info(playlists)")
+            playlist_columns = {row[1] for row in cursor.fetchall()}
+            needs_track_count = 'track_count' not in playlist_columns
+            if needs_track_count:
+                cursor.execute("ALTER TABLE playlists ADD COLUMN track_count INTEGER NOT NULL DEFAULT 0")
+            if 'snapshot_id' not in playlist_columns:
+                cursor.execute("ALTER TABLE playlists ADD COLUMN snapshot_id TEXT")
 
             # Tracks table - stores both TuneGenie and Spotify track info
             cursor.execute("""
@@ -38,264 +305,342 @@ class CacheDatabase:
                     spotify_artist TEXT,
                     spotify_title TEXT,
                     spotify_album TEXT,
-                    search_key TEXT,  -- normalized key for fallback searches
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     last_found TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
 
             # Junction table for playlist-track relationships
+            cursor.execute(PLAYLIST_TRACKS_DDL.format(table="playlist_tracks"))
+            self._migrate_playlist_tracks_without_rowid(cursor)
+
+            # Keep playlists.track_count in step with playlist_tracks
             cursor.execute("""
-                CREATE TABLE IF NOT EXISTS playlist_tracks (
-                    playlist_id TEXT,
-                    tunegenie_id TEXT,
-                    position INTEGER,
-                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    PRIMARY KEY (playlist_id, tunegenie_id),
-                    FOREIGN KEY (playlist_id) REFERENCES playlists (id),
-                    FOREIGN KEY (tunegenie_id) REFERENCES tracks (tunegenie_id)
-                )
+                CREATE TRIGGER IF NOT EXISTS trg_playlist_tracks_count_insert
+                AFTER INSERT ON playlist_tracks
+                BEGIN
+                    UPDATE playlists SET track_count = track_count + 1 WHERE id = NEW.playlist_id;
+                END
             """)
+            cursor.execute("""
+                CREATE TRIGGER IF NOT EXISTS trg_playlist_tracks_count_delete
+                AFTER DELETE ON playlist_tracks
+                BEGIN
+                    UPDATE playlists SET track_count = track_count - 1 WHERE id = OLD.playlist_id;
+                END
+            """)
+            if needs_track_count:
+                cursor.execute("""
+                    UPDATE playlists SET track_count = (
+                        SELECT COUNT(*) FROM playlist_tracks WHERE playlist_id = playlists.id
+                    )
+                """)
 
             # Create indexes for performance
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_search_key ON tracks (search_key)")
+            self._migrate_drop_search_key_column(cursor)
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_tracks_search_key_expr ON tracks ({SEARCH_KEY_EXPR})")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracks_spotify_uri ON tracks (spotify_uri)")
-            cursor.execute("CREATE INDEX IF NOT EXISTS idx_playlist_tracks_playlist ON playlist_tracks (playlist_id)")
+            # The (playlist_id, tunegenie_id) primary key already serves playlist_id lookups
+            cursor.execute("DROP INDEX IF EXISTS idx_playlist_tracks_playlist")
+            # Serves get_oldest_tracks_from_playlist's ORDER BY without a temp B-tree sort
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_playlist_tracks_oldest
+                ON playlist_tracks (playlist_id, added_at, position)
+            """)
 
-            conn.commit()
+        # Give the planner real statistics the first time around; PRAGMA optimize keeps them fresh
+        if not self._has_planner_stats():
+            with self._lock, self._conn as conn:
+                conn.execute("ANALYZE")
+
+    def _has_planner_stats(self) -> bool:
+        """Check whether ANALYZE has recorded any statistics in sqlite_stat1."""
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if not cursor.fetchone():
+                return False
+            cursor.execute("SELECT 1 FROM sqlite_stat1 LIMIT 1")
+            return cursor.fetchone() is not None
+
+    def _migrate_drop_search_key_column(self, cursor: sqlite3.Cursor):
+        """Drop the stored search_key column left by older versions (now an expression index)."""
+        cursor.execute("PRAGMA table_info(tracks)")
+        if 'search_key' not in {row[1] for row in cursor.fetchall()}:
+            return
+
+        cursor.execute("DROP INDEX IF EXISTS idx_tracks_search_key")
+        # DROP COLUMN needs SQLite 3.35+; on older builds the unused column is simply left behind
+        if sqlite3.sqlite_version_info >= (3, 35, 0):
+            cursor.execute("ALTER TABLE tracks DROP COLUMN search_key")
+
+    def _migrate_playlist_tracks_without_rowid(self, cursor: sqlite3.Cursor):
+        """Rebuild a playlist_tracks table created by older versions as WITHOUT ROWID."""
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'playlist_tracks'")
+        if "WITHOUT ROWID" in cursor.fetchone()[0].upper():
+            return
+
+        # Dropping the old table also drops its indexes; init_database recreates them afterwards
+        cursor.execute("DROP TABLE IF EXISTS playlist_tracks_new")
+        cursor.execute(PLAYLIST_TRACKS_DDL.format(table="playlist_tracks_new"))
+        cursor.execute("""
+            INSERT OR IGNORE INTO playlist_tracks_new (playlist_id, tunegenie_id, position, added_at)
+            SELECT playlist_id, tunegenie_id, position, added_at
+            FROM playlist_tracks
+            WHERE playlist_id IS NOT NULL AND tunegenie_id IS NOT NULL
+        """)
+        cursor.execute("DROP TABLE playlist_tracks")
+        cursor.execute("ALTER TABLE playlist_tracks_new RENAME TO playlist_tracks")
 
     def normalize_search_key(self, artist: str, title: str) -> str:
-        """Create normalized search key for deduplication."""
-        return f"{artist.lower().strip()}_{title.lower().strip()}"
+        """Create normalized search key for deduplication (Python-side twin of SEARCH_KEY_EXPR)."""
+        # trim() only strips spaces, unlike str.strip() with no arguments
+        return f"{artist.strip(' ').translate(_ASCII_LOWER)}_{title.strip(' ').translate(_ASCII_LOWER)}"
 
     def add_or_update_playlist(self, playlist_id: str, name: str, playlist_type: str):
         """Add or update playlist information."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO playlists (id, name, type, last_updated)
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-            """, (playlist_id, name, playlist_type))
-            conn.commit()
-
-    def get_cached_track_search(self, tunegenie_id: str) -> Optional[str]:
-        """Get cached Spotify URI for a TuneGenie track ID."""
-        with sqlite3.connect(self.db_path) as conn:
+            # Upsert rather than REPLACE so the trigger-maintained track_count survives
+            cursor.execute(_SQL_UPSERT_PLAYLIST, (playlist_id, name, playlist_type, playlist_id))
+
+    def get_cached_search_by_name(self, artist: str, title: str) -> Optional[Dict]:
+        """Get the cached search result for a song by artist and title, whatever its TuneGenie ID.
+
+        Returns None if the song was never searched; a failed search comes back with a None spotify_uri.
+        """
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT spotify_uri FROM tracks
-                WHERE tunegenie_id = ? AND spotify_uri IS NOT NULL
-            """, (tunegenie_id,))
+            cursor.execute(_SQL_SELECT_CACHED_SEARCH_BY_NAME, (artist, title))
             result = cursor.fetchone()
 
-            if result:
-                # Update last_found timestamp
-                cursor.execute("""
-                    UPDATE tracks SET last_found = CURRENT_TIMESTAMP
-                    WHERE tunegenie_id = ?
-                """, (tunegenie_id,))
-                conn.commit()
-                return result[0]
-
-            return None
+            if result is None:
+                return None
+
+            # Only successful matches are kept alive; failed searches age out via cleanup_old_data
+            if result['spotify_uri']:
+                self._touched_track_ids.add(result['tunegenie_id'])
+            return dict(result)
+
+    def invalidate_cached_search(self, tunegenie_id: str, artist: str, title: str):
+        """Forget a cache hit whose track is no longer available on Spotify.
+
+        Every cached match for the song is cleared and the hit is no longer kept alive,
+        so a stale row can't win get_cached_search_by_name again. Playlist entries for the
+        old URIs are kept on stub rows, since the tracks are still on the playlists.
+        """
+        with self._lock, self._conn as conn:
+            self._touched_track_ids.discard(tunegenie_id)
+            conn.execute(_SQL_INSERT_STUBS_FOR_MATCHED_PLAYLIST_TRACKS, (artist, title))
+            conn.execute(_SQL_MOVE_MATCHED_PLAYLIST_TRACKS_TO_STUBS, (artist, title))
+            conn.execute(_SQL_DELETE_MATCHED_PLAYLIST_TRACKS, (artist, title))
+            conn.execute(_SQL_CLEAR_CACHED_SEARCH_BY_NAME, (artist, title))
+
+    def flush_track_touches(self):
+        """Bump last_found for every cache hit recorded since the last flush."""
+        with self._lock, self._conn as conn:
+            if not self._touched_track_ids:
+                return
+            conn.executemany(_SQL_TOUCH_TRACK, [(tunegenie_id,) for tunegenie_id in self._touched_track_ids])
+            self._touched_track_ids.clear()
 
     def cache_track_search(self, tunegenie_id: str, tunegenie_artist: str, tunegenie_title: str,
                           spotify_uri: Optional[str], spotify_artist: str = None,
                           spotify_title: str = None, spotify_album: str = None):
         """Cache the result of a track search."""
-        search_key = self.normalize_search_key(tunegenie_artist, tunegenie_title)
+        self.cache_track_searches([(tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri,
+                                    spotify_artist, spotify_title, spotify_album)])
+
+    def cache_track_searches(self, rows: List[tuple]):
+        """Cache many track search results in a single transaction.
+
+        Each row is (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri,
+        spotify_artist, spotify_title, spotify_album), matching cache_track_search.
+        """
+        if not rows:
+            return
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO tracks
-                (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri, spotify_artist,
-                 spotify_title, spotify_album, search_key, created_at, last_found)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            """, (tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri, spotify_artist,
-                  spotify_title, spotify_album, search_key))
-            conn.commit()
+            cursor.executemany(_SQL_INSERT_TRACK, rows)
 
     def get_playlist_tracks(self, playlist_id: str) -> Set[str]:
         """Get all track URIs for a playlist from cache."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT t.spotify_uri
-                FROM tracks t
-                JOIN playlist_tracks pt ON t.tunegenie_id = pt.tunegenie_id
-                WHERE pt.playlist_id = ? AND t.spotify_uri IS NOT NULL
-                ORDER BY pt.position
-            """, (playlist_id,))
+            cursor.execute(_SQL_SELECT_PLAYLIST_URIS, (playlist_id,))
             return {row[0] for row in cursor.fetchall()}
 
+    def filter_new_uris(self, playlist_id: str, spotify_uris: List[str]) -> List[str]:
+        """Get the URIs not already cached for a playlist, keeping their order."""
+        if not spotify_uris:
+            return []
+
+        # Two parameters per URI, plus the playlist ID
+        chunk_size = (MAX_SQL_VARIABLES - 1) // 2
+        new_uris = []
+
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(spotify_uris), chunk_size):
+                chunk = spotify_uris[i:i + chunk_size]
+                values = ','.join(['(?, ?)'] * len(chunk))
+                params = []
+                for row_num, uri in enumerate(chunk):
+                    params.extend((row_num, uri))
+                params.append(playlist_id)
+                cursor.execute(_SQL_SELECT_URIS_NOT_IN_PLAYLIST.format(values=values), params)
+                new_uris.extend(row[0] for row in cursor.fetchall())
+
+        return new_uris
+
     def update_playlist_tracks(self, playlist_id: str, spotify_track_uris: List[str]):
         """Update the cached tracks for a playlist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
 
             # Clear existing playlist tracks
-            cursor.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            cursor.execute(_SQL_DELETE_PLAYLIST_TRACKS, (playlist_id,))
 
             # Add tracks that exist in our tracks table
-            for position, uri in enumerate(spotify_track_uris):
-                cursor.execute("""
-                    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position)
-                    SELECT ?, tunegenie_id, ?
-                    FROM tracks
-                    WHERE spotify_uri = ?
-                """, (playlist_id, position, uri))
+            cursor.executemany(_SQL_INSERT_PLAYLIST_TRACK_BY_URI,
+                               [(playlist_id, position, uri) for position, uri in enumerate(spotify_track_uris)])
 
-            conn.commit()
+    def update_playlist_tracks_with_timestamps(self, playlist_id: str, track_data: List[tuple]) -> bool:
+        """Update the cached tracks for a playlist with Spotify-provided timestamps.
 
-    def update_playlist_tracks_with_timestamps(self, playlist_id: str, track_data: List[tuple]):
-        """Update the cached tracks for a playlist with Spotify-provided timestamps."""
-        with sqlite3.connect(self.db_path) as conn:
+        Tracks without a search result get a stub row first. Returns whether every track on
+        the playlist made it into the cache.
+        """
+        uris = {uri for uri, _ in track_data}
+
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
 
             # Clear existing playlist tracks
-            cursor.execute("DELETE FROM playlist_tracks WHERE playlist_id = ?", (playlist_id,))
+            cursor.execute(_SQL_DELETE_PLAYLIST_TRACKS, (playlist_id,))
+
+            cursor.executemany(_SQL_INSERT_STUB_TRACK, [(uri,) for uri in uris])
 
             # Add tracks with Spotify-provided added_at timestamps
-            for position, (uri, added_at) in enumerate(track_data):
-                cursor.execute("""
-                    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position, added_at)
-                    SELECT ?, tunegenie_id, ?, ?
-                    FROM tracks
-                    WHERE spotify_uri = ?
-                """, (playlist_id, position, added_at, uri))
+            cursor.executemany(_SQL_INSERT_PLAYLIST_TRACK_BY_URI_WITH_ADDED_AT,
+                               [(playlist_id, position, added_at, uri)
+                                for position, (uri, added_at) in enumerate(track_data)])
 
-            conn.commit()
+            cursor.execute(_SQL_COUNT_CACHED_PLAYLIST_URIS, (playlist_id,))
+            return cursor.fetchone()[0] == len(uris)
 
     def add_tracks_to_playlist_cache(self, playlist_id: str, tunegenie_ids: List[str]):
         """Add tracks to playlist cache by TuneGenie IDs (for cumulative playlist updates)."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
+        if not tunegenie_ids:
+            return
 
-            # Get current max position
-            cursor.execute("""
-                SELECT COALESCE(MAX(position), -1)
-                FROM playlist_tracks
-                WHERE playlist_id = ?
-            """, (playlist_id,))
-            max_position = cursor.fetchone()[0]
-
-            # Add new tracks
-            for i, tunegenie_id in enumerate(tunegenie_ids):
-                position = max_position + i + 1
-                cursor.execute("""
-                    INSERT OR IGNORE INTO playlist_tracks (playlist_id, tunegenie_id, position)
-                    VALUES (?, ?, ?)
-                """, (playlist_id, tunegenie_id, position))
+        # Two parameters per track, plus the playlist ID bound twice
+        chunk_size = (MAX_SQL_VARIABLES - 2) // 2
 
-            conn.commit()
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(tunegenie_ids), chunk_size):
+                chunk = tunegenie_ids[i:i + chunk_size]
+                values = ','.join(['(?, ?)'] * len(chunk))
+                params = [playlist_id]
+                for offset, tunegenie_id in enumerate(chunk, start=1):
+                    params.extend((offset, tunegenie_id))
+                params.append(playlist_id)
+                cursor.execute(_SQL_APPEND_PLAYLIST_TRACKS.format(values=values), params)
+
+    def add_uris_to_playlist_cache(self, playlist_id: str, spotify_uris: List[str]):
+        """Append tracks to a playlist cache by Spotify URI, leaving the cached tracks untouched."""
+        if not spotify_uris:
+            return
+
+        # Two parameters per track, plus the playlist ID bound twice
+        chunk_size = (MAX_SQL_VARIABLES - 2) // 2
+
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            for i in range(0, len(spotify_uris), chunk_size):
+                chunk = spotify_uris[i:i + chunk_size]
+                values = ','.join(['(?, ?)'] * len(chunk))
+                params = [playlist_id]
+                for offset, uri in enumerate(chunk, start=1):
+                    params.extend((offset, uri))
+                params.append(playlist_id)
+                cursor.execute(_SQL_APPEND_PLAYLIST_TRACKS_BY_URI.format(values=values), params)
 
     def get_track_by_uri(self, spotify_uri: str) -> Optional[Dict]:
         """Get track details by Spotify URI."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri,
-                       spotify_artist, spotify_title, spotify_album
-                FROM tracks
-                WHERE spotify_uri = ?
-            """, (spotify_uri,))
-            result = cursor.fetchone()
-
-            if result:
-                return {
-                    'tunegenie_id': result[0],
-                    'tunegenie_artist': result[1],
-                    'tunegenie_title': result[2],
-                    'spotify_uri': result[3],
-                    'spotify_artist': result[4],
-                    'spotify_title': result[5],
-                    'spotify_album': result[6]
-                }
-            return None
+            cursor.execute(_SQL_SELECT_TRACK_BY_URI, (spotify_uri,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     def get_track_by_tunegenie_id(self, tunegenie_id: str) -> Optional[Dict]:
         """Get track details by TuneGenie ID."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT tunegenie_id, tunegenie_artist, tunegenie_title, spotify_uri,
-                       spotify_artist, spotify_title, spotify_album
-                FROM tracks
-                WHERE tunegenie_id = ?
-            """, (tunegenie_id,))
-            result = cursor.fetchone()
-
-            if result:
-                return {
-                    'tunegenie_id': result[0],
-                    'tunegenie_artist': result[1],
-                    'tunegenie_title': result[2],
-                    'spotify_uri': result[3],
-                    'spotify_artist': result[4],
-                    'spotify_title': result[5],
-                    'spotify_album': result[6]
-                }
-            return None
+            cursor.execute(_SQL_SELECT_TRACK_BY_TUNEGENIE_ID, (tunegenie_id,))
+            row = cursor.fetchone()
+            return dict(row) if row else None
 
     def get_playlist_track_count(self, playlist_id: str) -> int:
         """Get the total number of tracks in a playlist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT COUNT(*)
-                FROM playlist_tracks
-                WHERE playlist_id = ?
-            """, (playlist_id,))
+            cursor.execute(_SQL_SELECT_PLAYLIST_TRACK_COUNT, (playlist_id,))
+            result = cursor.fetchone()
+            if result:
+                return result[0]
+
+            # Playlist not registered yet, so there is no maintained count to read
+            cursor.execute(_SQL_COUNT_PLAYLIST_TRACKS, (playlist_id,))
             return cursor.fetchone()[0]
 
+    def get_playlist_snapshot_id(self, playlist_id: str) -> Optional[str]:
+        """Get the Spotify snapshot ID the cached playlist tracks were last known to match."""
+        with self._lock, self._conn as conn:
+            cursor = conn.cursor()
+            cursor.execute(_SQL_SELECT_PLAYLIST_SNAPSHOT_ID, (playlist_id,))
+            result = cursor.fetchone()
+            return result[0] if result else None
+
+    def set_playlist_snapshot_id(self, playlist_id: str, snapshot_id: Optional[str]):
+        """Record the Spotify snapshot ID the cached playlist tracks match (None marks the cache stale)."""
+        with self._lock, self._conn as conn:
+            conn.execute(_SQL_UPDATE_PLAYLIST_SNAPSHOT_ID, (snapshot_id, playlist_id))
+
     def get_oldest_tracks_from_playlist(self, playlist_id: str, count: int) -> List[str]:
         """Get the oldest tracks from a playlist based on added_at timestamp."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT t.spotify_uri
-                FROM playlist_tracks pt
-                JOIN tracks t ON pt.tunegenie_id = t.tunegenie_id
-                WHERE pt.playlist_id = ? AND t.spotify_uri IS NOT NULL
-                ORDER BY pt.added_at ASC, pt.position ASC
-                LIMIT ?
-            """, (playlist_id, count))
+            cursor.execute(_SQL_SELECT_OLDEST_PLAYLIST_URIS, (playlist_id, count))
             return [row[0] for row in cursor.fetchall()]
 
     def remove_tracks_from_playlist_cache(self, playlist_id: str, spotify_uris: List[str]):
         """Remove specific tracks from playlist cache."""
-        with sqlite3.connect(self.db_path) as conn:
+        if not spotify_uris:
+            return
+
+        # One parameter is taken by the playlist ID
+        chunk_size = MAX_SQL_VARIABLES - 1
+
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            for uri in spotify_uris:
-                cursor.execute("""
-                    DELETE FROM playlist_tracks
-                    WHERE playlist_id = ? AND tunegenie_id IN (
-                        SELECT tunegenie_id FROM tracks WHERE spotify_uri = ?
-                    )
-                """, (playlist_id, uri))
-            conn.commit()
+            for i in range(0, len(spotify_uris), chunk_size):
+                chunk = spotify_uris[i:i + chunk_size]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(_SQL_DELETE_PLAYLIST_TRACKS_BY_URI.format(placeholders=placeholders),
+                               (playlist_id, *chunk))
 
     def get_cache_stats(self) -> Dict[str, int]:
         """Get statistics about cached data."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
 
-            # Count tracks with successful Spotify matches
-            cursor.execute("SELECT COUNT(*) FROM tracks WHERE spotify_uri IS NOT NULL")
-            successful_searches = cursor.fetchone()[0]
-
-            # Count tracks with failed searches (no Spotify match)
-            cursor.execute("SELECT COUNT(*) FROM tracks WHERE spotify_uri IS NULL")
-            failed_searches = cursor.fetchone()[0]
-
-            # Count playlists
-            cursor.execute("SELECT COUNT(*) FROM playlists")
-            playlist_count = cursor.fetchone()[0]
-
-            # Count total playlist entries
-            cursor.execute("SELECT COUNT(*) FROM playlist_tracks")
-            playlist_track_count = cursor.fetchone()[0]
+            # Successful/failed searches plus playlist totals in one round trip
+            cursor.execute(_SQL_SELECT_CACHE_STATS)
+            successful_searches, failed_searches, playlist_count, playlist_track_count = cursor.fetchone()
 
             return {
                 'successful_searches': successful_searches,
@@ -307,35 +652,52 @@ class CacheDatabase:
 
     def cleanup_old_data(self, days: int = 30):
         """Clean up old search results that haven't been found recently."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                DELETE FROM tracks
-                WHERE last_found < datetime('now', '-{} days')
-                AND spotify_uri IS NULL
-            """.format(days))
+            cursor.execute(_SQL_DELETE_STALE_FAILED_SEARCHES, (f"-{int(days)} days",))
             deleted = cursor.rowcount
-            conn.commit()
+            # Stubs only exist for playlist tracks; drop those no playlist holds any more
+            cursor.execute(_SQL_DELETE_UNUSED_STUB_TRACKS)
+
+            # Row counts changed noticeably, refresh the planner statistics
+            if deleted > 0:
+                cursor.execute("ANALYZE")
+
             return deleted
 
     def get_tracks_needing_spotify_search(self, tunegenie_ids: List[str]) -> List[Dict]:
-        """Get tracks that need Spotify search (not in cache or failed previous search)."""
+        """Get tracks that need Spotify search (not in cache or failed previous search).
+
+        Tracks that were never cached come back with None for the artist and title.
+        """
         if not tunegenie_ids:
             return []
 
-        placeholders = ','.join(['?' for _ in tunegenie_ids])
+        unique_ids = list(dict.fromkeys(tunegenie_ids))
+        tracks = []
 
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock, self._conn as conn:
             cursor = conn.cursor()
-            cursor.execute(f"""
-                SELECT tunegenie_id, tunegenie_artist, tunegenie_title
-                FROM tracks
-                WHERE tunegenie_id IN ({placeholders})
-                AND spotify_uri IS NULL
-            """, tunegenie_ids)
-
-            failed_searches = {row[0]: {'tunegenie_id': row[0], 'tunegenie_artist': row[1], 'tunegenie_title': row[2]}
-                             for row in cursor.fetchall()}
-
-            # Return tracks that either aren't cached or have failed searches
-            return [track for track_id, track in failed_searches.items()]
\ No newline at end of file
+            for i in range(0, len(unique_ids), MAX_SQL_VARIABLES):
+                chunk = unique_ids[i:i + MAX_SQL_VARIABLES]
+                values = ','.join(['(?)'] * len(chunk))
+                cursor.execute(_SQL_SELECT_TRACKS_NEEDING_SEARCH.format(values=values), chunk)
+                tracks.extend({'tunegenie_id': row[0], 'tunegenie_artist': row[1], 'tunegenie_title': row[2]}
+                              for row in cursor.fetchall())
+
+        return tracks
+
+    def close(self):
+        """Flush pending cache hits, refresh planner statistics, checkpoint the WAL and close."""
+        if self._conn is None:
+            return
+
+        self.flush_track_touches()
+
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("PRAGMA optimize")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+            self._conn = None
@@ -9,9 +9,11 @@ Usage:
 """
 
 import argparse
+import logging
+import os
 import sys
 
-from config import get_spotify_config
+from config import get_unconfigured_spotify_keys
 from spotify_setup import SpotifySetup
 from spotify_updater import SpotifyUpdater
 
@@ -28,33 +30,38 @@ def main():
 
     args = parser.parse_args()
 
+    # Per-track progress is logged at DEBUG; set LOGLEVEL=DEBUG to see it
+    log_level = os.getenv("LOGLEVEL", "INFO").upper()
+    # getLevelName maps a known level name to its number, anything else to a string
+    valid_level = isinstance(logging.getLevelName(log_level), int)
+    logging.basicConfig(
+        level=log_level if valid_level else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s"
+    )
+    if not valid_level:
+        logging.warning("⚠ Unknown LOGLEVEL %r, using INFO", log_level)
+
     if args.setup:
         # Run setup mode
         SpotifySetup.run_setup()
     else:
-        # Check if credentials are configured
-        spotify_config = get_spotify_config()
+        # Check that every required setting is configured, reporting all missing ones at once
+        missing_keys = get_unconfigured_spotify_keys('client_id', 'client_secret', 'refresh_token', 'daily_playlist_id')
 
-        if "YOUR_" in spotify_config['client_id'] or "YOUR_" in spotify_config['client_secret']:
-            print("ERROR: Please configure your Spotify credentials in config.json.")
-            print("\nRun with --setup flag to begin configuration:")
-            print("  python main.py --setup")
-            sys.exit(1)
+        if missing_keys:
+            print(f"ERROR: Please configure these Spotify settings in config.json: {', '.join(missing_keys)}")
 
-        if "YOUR_" in spotify_config['refresh_token']:
-            print("ERROR: Missing Spotify refresh token.")
-            print("\nRun with --setup flag to authenticate:")
-            print("  python main.py --setup")
-            sys.exit(1)
+            if 'daily_playlist_id' in missing_keys:
+                print("\nTo get your playlist ID:")
+                print("1. Right-click on a playlist in Spotify")
+                print("2. Share -> Copy link to playlist")
+                print("3. Extract the ID from the URL")
+                print("4. Update 'daily_playlist_id' in config.json")
+                print("5. Optionally update 'cumulative_playlist_id' for a growing collection")
 
-        if "YOUR_" in spotify_config['daily_playlist_id']:
-            print("ERROR: Please configure your daily playlist ID in config.json.")
-            print("\nTo get your playlist ID:")
-            print("1. Right-click on a playlist in Spotify")
-            print("2. Share -> Copy link to playlist")
-            print("3. Extract the ID from the URL")
-            print("4. Update 'daily_playlist_id' in config.json")
-            print("5. Optionally update 'cumulative_playlist_id' for a growing collection")
+            if missing_keys != ['daily_playlist_id']:
+                print("\nRun with --setup flag to configure and authenticate:")
+                print("  python main.py --setup")
             sys.exit(1)
 
         # Run the updater
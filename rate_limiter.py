@@ -0,0 +1,29 @@
+"""Thread-safe rate limiting for outgoing API requests."""
+
+import threading
+import time
+
+
+class RateLimiter:
+    """Leaky bucket that spaces requests evenly so the sustained rate stays under a limit."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the caller may send its next request."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+
+        # Sleep outside the lock so other threads can reserve their own slots
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for the given time (e.g. after a 429 Retry-After)."""
+        with self._lock:
+            self._next_slot = max(self._next_slot, time.monotonic() + seconds)
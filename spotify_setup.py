@@ -1,13 +1,12 @@
 """Spotify OAuth setup functionality for getting refresh tokens."""
 
-import base64
 import webbrowser
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlencode, urlparse, parse_qs
 from typing import Optional, Dict
 
 import requests
 
-from config import get_spotify_config, save_config, load_config, SPOTIFY_REDIRECT_URI, SPOTIFY_SCOPE
+from config import get_spotify_basic_auth, get_spotify_config, get_unconfigured_spotify_keys, save_config, load_config, SPOTIFY_REDIRECT_URI, SPOTIFY_SCOPE
 
 
 class SpotifySetup:
@@ -24,20 +23,15 @@ class SpotifySetup:
             "scope": SPOTIFY_SCOPE,
             "show_dialog": "true"
         }
-        param_string = "&".join([f"{k}={v}" for k, v in params.items()])
-        return f"https://accounts.spotify.com/authorize?{param_string}"
+        return f"https://accounts.spotify.com/authorize?{urlencode(params)}"
 
     @staticmethod
     def exchange_code_for_tokens(auth_code: str) -> Optional[Dict]:
         """Exchange authorization code for access and refresh tokens."""
-        spotify_config = get_spotify_config()
         token_url = "https://accounts.spotify.com/api/token"
 
-        client_creds = f"{spotify_config['client_id']}:{spotify_config['client_secret']}"
-        client_creds_b64 = base64.b64encode(client_creds.encode()).decode()
-
         headers = {
-            "Authorization": f"Basic {client_creds_b64}",
+            "Authorization": get_spotify_basic_auth(),
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
@@ -67,7 +61,7 @@ class SpotifySetup:
         spotify_config = get_spotify_config()
 
         # Check if credentials are configured
-        if "YOUR_" in spotify_config['client_id'] or "YOUR_" in spotify_config['client_secret']:
+        if get_unconfigured_spotify_keys('client_id', 'client_secret'):
             print("\n⚠️  First, you need to configure your Spotify App credentials:")
             print("1. Go to https://developer.spotify.com/dashboard")
             print("2. Create a new app (or use existing)")
@@ -106,19 +100,13 @@ class SpotifySetup:
         # Get the code from user
         auth_code = input("\nPaste the authorization code here: ").strip()
 
-        # Clean up the code if user pasted the whole URL
+        # Clean up the code if user pasted the whole URL (or just its "code=..." query)
         if "code=" in auth_code:
-            # User might have pasted the whole URL
-            try:
-                parsed = urlparse(auth_code)
-                params = parse_qs(parsed.query)
-                if 'code' in params:
-                    auth_code = params['code'][0]
-                    print("✓ Extracted code from URL")
-            except:
-                # Try simple split
-                if "code=" in auth_code:
-                    auth_code = auth_code.split("code=")[1].split("&")[0]
+            query = urlparse(auth_code).query or auth_code
+            extracted_code = parse_qs(query).get('code', [''])[0]
+            if extracted_code:
+                auth_code = extracted_code
+                print("✓ Extracted code from URL")
 
         if not auth_code:
             print("\n✗ No authorization code provided")
@@ -1,50 +1,172 @@
 """Core Spotify playlist updating functionality."""
 
-import base64
+import functools
+import hashlib
 import json
+import logging
+import math
+import os
 import sys
-from datetime import datetime, timedelta
-from typing import List, Dict, Set, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import List, Dict, Set, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from config import get_spotify_config, get_tunegenie_config
+from config import (
+    TOKEN_CACHE_FILE, clear_spotify_token_cache, get_spotify_basic_auth, get_spotify_config,
+    get_tunegenie_config
+)
 from database import CacheDatabase
+from rate_limiter import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+# Identifies this script in the User-Agent header of every request
+USER_AGENT = "spotify-tunegenie-updater"
+
+# How many times a connection failure or 5xx response is retried. Only idempotent methods are
+# retried on 5xx, so a POST that may have gone through never adds its tracks twice.
+MAX_SERVER_ERROR_RETRIES = 3
+
+# How many times a request rejected with HTTP 429 is retried after waiting out Retry-After
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Wait used when a 429 response has no usable Retry-After header
+DEFAULT_RETRY_AFTER = 1
+
+# Refresh this many seconds before the cached token actually expires
+TOKEN_EXPIRY_MARGIN = 60
+
+# Failed searches are cached for this long before the song is searched again
+FAILED_SEARCH_TTL_DAYS = 7
+
+# Maximum number of IDs accepted by GET /v1/tracks
+TRACKS_LOOKUP_BATCH_SIZE = 50
+
+# Maximum number of items returned per page by GET /v1/playlists/{id}/tracks
+PLAYLIST_PAGE_SIZE = 100
+
+
+@functools.lru_cache(maxsize=1)
+def _day_timeframe(day: date, timezone_offset: str) -> Dict[str, str]:
+    """Build the TuneGenie since/until range covering one day (formatted once per day)."""
+    day_string = day.isoformat()
+    return {
+        "since": f"{day_string}T00:00:00.00{timezone_offset}",
+        "until": f"{day_string}T23:59:00.00{timezone_offset}"
+    }
+
+
+def _parse_retry_after(value: Optional[str]) -> int:
+    """Turn a Retry-After header (delay in seconds or an HTTP date) into seconds to wait."""
+    if value is None:
+        return DEFAULT_RETRY_AFTER
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RETRY_AFTER
+    # Dates given as "-0000" come back without a timezone; HTTP dates are always UTC
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0, math.ceil((retry_at - datetime.now(timezone.utc)).total_seconds()))
 
 
 class SpotifyUpdater:
     """Handles fetching songs from TuneGenie and updating Spotify playlists."""
 
+    __slots__ = (
+        'access_token', 'auth_headers', 'spotify_config', 'tunegenie_config', 'cache_db',
+        'session', 'rate_limiter', 'pending_track_cache', 'token_cache', 'token_lock'
+    )
+
     def __init__(self):
         self.access_token = None
-        self.processed_tracks = set()
+        self.auth_headers = {}  # Bearer header sent with every Spotify Web API request
         self.spotify_config = get_spotify_config()
         self.tunegenie_config = get_tunegenie_config()
         self.cache_db = CacheDatabase()
+        # One session for every request so connections to Spotify and TuneGenie are kept alive
+        self.session = requests.Session()
+        # requests already advertises every compression it can decode (gzip, deflate, plus br when brotli is installed)
+        self.session.headers.update({"User-Agent": USER_AGENT, "Accept": "application/json"})
+        # Size the connection pool for the worker threads so concurrent requests don't discard connections,
+        # and retry connection failures and transient 5xx responses with exponential backoff
+        self.session.mount("https://", HTTPAdapter(
+            pool_maxsize=self.spotify_config['search_concurrency'],
+            max_retries=Retry(
+                total=MAX_SERVER_ERROR_RETRIES,
+                backoff_factor=0.5,
+                status_forcelist=[500, 502, 503, 504],
+                raise_on_status=False
+            )
+        ))
+        self.rate_limiter = RateLimiter(self.spotify_config['requests_per_second'])
+        self.pending_track_cache = []  # Search results waiting to be written to the cache
+        self.token_cache = self._load_token_cache()
+        self.token_lock = threading.Lock()  # Serializes refreshes after Spotify rejects a token
+
+    def _token_cache_owner(self) -> Dict[str, str]:
+        """Identify the credentials a cached token belongs to (the refresh token only as a hash)."""
+        return {
+            "client_id": self.spotify_config['client_id'],
+            "refresh_token_sha256": hashlib.sha256(self.spotify_config['refresh_token'].encode()).hexdigest()
+        }
+
+    def _load_token_cache(self) -> Dict:
+        """Load the access token saved by a previous run, if any."""
+        try:
+            with open(TOKEN_CACHE_FILE, 'r') as f:
+                token_cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        # A token issued to a different Spotify app or account (or with other scopes) must not be reused
+        if any(token_cache.get(key) != value for key, value in self._token_cache_owner().items()):
+            return {}
+        return token_cache
+
+    def _save_token_cache(self, access_token: str, expires_in: int):
+        """Persist the access token atomically so a crash never leaves a half-written cache file."""
+        self.token_cache = self._token_cache_owner() | {
+            "access_token": access_token,
+            "expires_at": time.time() + expires_in
+        }
+        temp_file = f"{TOKEN_CACHE_FILE}.tmp"
+        try:
+            # The file holds a bearer token, so only the owner may read it
+            fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.token_cache, f)
+            os.replace(temp_file, TOKEN_CACHE_FILE)
+        except OSError as e:
+            logger.warning("⚠ Could not save Spotify token cache: %s", e)
 
     def get_yesterday_timeframe(self) -> Dict[str, str]:
         """Calculate yesterday's date range in the required format."""
-        yesterday = datetime.now() - timedelta(days=1)
-        since = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-        until = yesterday.replace(hour=23, minute=59, second=0, microsecond=0)
-
-        # Format with timezone offset from config
-        timezone_offset = self.tunegenie_config['timezone_offset']
-        return {
-            "since": since.strftime(f"%Y-%m-%dT%H:%M:%S.00{timezone_offset}"),
-            "until": until.strftime(f"%Y-%m-%dT%H:%M:%S.00{timezone_offset}")
-        }
+        return _day_timeframe(date.today() - timedelta(days=1), self.tunegenie_config['timezone_offset'])
 
     def refresh_spotify_token(self) -> bool:
-        """Refresh the Spotify access token using the refresh token."""
-        token_url = "https://accounts.spotify.com/api/token"
+        """Refresh the Spotify access token using the refresh token, reusing a cached token while it is valid."""
+        if self.token_cache and time.time() < self.token_cache.get('expires_at', 0) - TOKEN_EXPIRY_MARGIN:
+            self._set_access_token(self.token_cache['access_token'])
+            logger.info("✓ Using cached Spotify access token")
+            return True
 
-        # Encode client credentials
-        client_creds = f"{self.spotify_config['client_id']}:{self.spotify_config['client_secret']}"
-        client_creds_b64 = base64.b64encode(client_creds.encode()).decode()
+        token_url = "https://accounts.spotify.com/api/token"
 
         headers = {
-            "Authorization": f"Basic {client_creds_b64}",
+            "Authorization": get_spotify_basic_auth(),
             "Content-Type": "application/x-www-form-urlencoded"
         }
 
@@ -54,298 +176,410 @@ class SpotifyUpdater:
         }
 
         try:
-            response = requests.post(token_url, headers=headers, data=data)
+            response = self.session.post(token_url, headers=headers, data=data)
             response.raise_for_status()
             token_data = response.json()
-            self.access_token = token_data["access_token"]
-            print("✓ Spotify access token refreshed successfully")
+            access_token = token_data.get("access_token")
+            if not access_token:
+                # Only log the field names; the response may still carry credentials
+                logger.error("✗ No access token in Spotify token response (fields: %s)", ', '.join(token_data))
+                return False
+
+            self._set_access_token(access_token)
+            self._save_token_cache(access_token, token_data.get("expires_in", 3600))
+            logger.info("✓ Spotify access token refreshed successfully")
             return True
         except requests.exceptions.RequestException as e:
-            print(f"✗ Failed to refresh Spotify token: {e}")
+            logger.error("✗ Failed to refresh Spotify token: %s", e)
             if hasattr(e.response, 'text'):
-                print(f"Response: {e.response.text}")
+                logger.error("Response: %s", e.response.text)
             return False
 
+    def _set_access_token(self, access_token: str):
+        """Use a new access token, building its Authorization header once for all later requests."""
+        # Kept off the shared session so the token is never sent to TuneGenie or the accounts service.
+        # The header is swapped in first so a request never pairs the new token with the old header.
+        self.auth_headers = {"Authorization": f"Bearer {access_token}"}
+        self.access_token = access_token
+
+    def _replace_rejected_token(self, rejected_token: Optional[str]) -> bool:
+        """Get a new access token after Spotify answered 401 to rejected_token.
+
+        Returns True if the request should be sent again with the current token.
+        """
+        with self.token_lock:
+            # Another worker may already have replaced the token while this request was in flight
+            if self.access_token != rejected_token:
+                return True
+
+            # A cached token can be revoked before it expires; drop it and refresh once
+            logger.warning("⚠ Spotify rejected the access token, requesting a new one")
+            self.token_cache = {}
+            clear_spotify_token_cache()
+            return self.refresh_spotify_token()
+
+    def _spotify_request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a Spotify Web API request through the shared rate limiter, honouring 429 Retry-After.
+
+        A 401 triggers one token refresh, after which the request is sent again.
+        """
+        token_refreshed = False
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            self.rate_limiter.acquire()
+            access_token = self.access_token
+            response = self.session.request(method, url, headers=self.auth_headers, **kwargs)
+
+            if response.status_code == 401 and not token_refreshed and attempt < MAX_RATE_LIMIT_RETRIES:
+                token_refreshed = True
+                if self._replace_rejected_token(access_token):
+                    continue
+                return response
+
+            if response.status_code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                return response
+
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            logger.warning("⚠ Rate limited by Spotify, retrying in %ss", retry_after)
+            # Pause every worker, not just this one, so the retries don't stampede
+            self.rate_limiter.pause(retry_after)
+
+        return response
+
     def fetch_tunegenie_songs(self) -> List[Dict]:
-        """Fetch songs from TuneGenie API for yesterday."""
+        """Fetch the unique songs played yesterday from TuneGenie API, in order of first play."""
         timeframe = self.get_yesterday_timeframe()
-        params = {**self.tunegenie_config['api_params'], **timeframe}
+        params = self.tunegenie_config['api_params'] | timeframe
 
-        print(f"Fetching songs from {timeframe['since']} to {timeframe['until']}")
-        print(f"Full URL with params: {self.tunegenie_config['api_url']}")
-        print(f"Parameters: {params}")
+        logger.info("Fetching songs from %s to %s", timeframe['since'], timeframe['until'])
+        logger.debug("Full URL with params: %s", self.tunegenie_config['api_url'])
+        logger.debug("Parameters: %s", params)
 
         try:
-            response = requests.get(self.tunegenie_config['api_url'], params=params)
+            response = self.session.get(self.tunegenie_config['api_url'], params=params)
             response.raise_for_status()
             data = response.json()
 
-            # Debug: Print the full JSON response
-            print("\n" + "=" * 50)
-            print("DEBUG: TuneGenie API Response:")
-            print("=" * 50)
-            print(json.dumps(data, indent=2))
-            print("=" * 50 + "\n")
-
-            # Extract song information
-            songs = []
-            # The API returns a direct array of song objects
-            if isinstance(data, list):
-                for item in data:
-                    # Each item has 'artist' and 'song' fields at the root level
-                    if "artist" in item and "song" in item:
-                        # Use TuneGenie's "sid" field as the unique identifier
-                        tunegenie_id = item.get("sid")
-                        if not tunegenie_id:
-                            # Fallback: create ID from timestamp + artist + song for uniqueness
-                            timestamp = item.get("played_at", "")
-                            tunegenie_id = f"fallback_{timestamp}_{item.get('artist', '')}_{item.get('song', '')}"
-
-                        song_info = {
-                            "tunegenie_id": tunegenie_id,
-                            "artist": item.get("artist", ""),
-                            "title": item.get("song", ""),
-                            "timestamp": item.get("played_at", ""),
-                            "raw_data": item  # Store full data for debugging
-                        }
-                        songs.append(song_info)
-
-            print(f"✓ Found {len(songs)} songs from TuneGenie")
+            # Debug: Log the full JSON response, serializing it only when DEBUG logging is on
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("TuneGenie API Response:\n%s", json.dumps(data, indent=2))
+
+            # The API returns a direct array of song objects, each with 'artist' and 'song' at the root level
+            plays = [item for item in (data if isinstance(data, list) else []) if "artist" in item and "song" in item]
+
+            # Keep only the first play of each song so it is searched once, merging exactly the
+            # variants the search cache treats as the same song
+            first_plays = {}
+            for item in plays:
+                first_plays.setdefault(self.cache_db.normalize_search_key(item["artist"], item["song"]), item)
+
+            songs = [
+                {
+                    # Use TuneGenie's "sid" field as the unique identifier, falling back to
+                    # timestamp + artist + song for uniqueness
+                    "tunegenie_id": item.get("sid") or f"fallback_{item.get('played_at', '')}_{item['artist']}_{item['song']}",
+                    "artist": item["artist"],
+                    "title": item["song"]
+                }
+                for item in first_plays.values()
+            ]
+
+            logger.info("✓ Found %s plays of %s unique songs from TuneGenie", len(plays), len(songs))
             return songs
 
         except requests.exceptions.RequestException as e:
-            print(f"✗ Failed to fetch TuneGenie data: {e}")
+            logger.error("✗ Failed to fetch TuneGenie data: %s", e)
             if hasattr(e, 'response') and e.response is not None:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response text: {e.response.text}")
+                logger.error("Response status: %s", e.response.status_code)
+                logger.error("Response text: %s", e.response.text)
             return []
 
-    def search_spotify_track(self, tunegenie_id: str, artist: str, title: str) -> str:
-        """Search for a track on Spotify and return its URI, using cache when possible."""
+    def search_spotify_track(self, tunegenie_id: str, artist: str, title: str) -> Optional[str]:
+        """Search for a single track on Spotify and return its URI, using cache when possible."""
+        song = {"tunegenie_id": tunegenie_id, "artist": artist, "title": title}
+        uri = self.search_spotify_tracks([song])[0]
+        self.flush_track_cache()
+        return uri
+
+    def search_spotify_tracks(self, songs: List[Dict]) -> List[Optional[str]]:
+        """Search Spotify for many songs, running the cache misses concurrently.
+
+        Songs whose last search found nothing are not searched again until that
+        result is FAILED_SEARCH_TTL_DAYS old.
+
+        Returns the Spotify URI (or None) for each song, in the same order as songs.
+        """
         if not self.access_token:
-            return None
+            return [None] * len(songs)
+
+        uris = [None] * len(songs)
+        hit_ids = {}  # Song index -> TuneGenie ID of the cached row that matched it
+        misses = []
+        failed = set()  # Indexes of songs whose search errored rather than found nothing
+
+        # Cache lookups stay on this thread; only the network calls fan out
+        for i, song in enumerate(songs):
+            # Look songs up by name so plays under a different TuneGenie ID still hit the cache
+            cached = self.cache_db.get_cached_search_by_name(song['artist'], song['title'])
+            if cached is None:
+                misses.append(i)
+            elif cached['spotify_uri']:
+                logger.debug("  ✓ Cache hit: %s - %s", song['artist'], song['title'])
+                uris[i] = cached['spotify_uri']
+                hit_ids[i] = cached['tunegenie_id']
+            else:
+                logger.debug("  ⚠ Previously not found on Spotify: %s - %s", song['artist'], song['title'])
+
+        # Cached URIs can go stale when Spotify pulls a track; search for those again
+        valid_uris = self.validate_track_uris([uris[i] for i in hit_ids])
+        for i, tunegenie_id in hit_ids.items():
+            if uris[i] not in valid_uris:
+                logger.warning("  ⚠ Cached track no longer available: %s - %s", songs[i]['artist'], songs[i]['title'])
+                self.cache_db.invalidate_cached_search(tunegenie_id, songs[i]['artist'], songs[i]['title'])
+                uris[i] = None
+                misses.append(i)
+
+        if misses:
+            with ThreadPoolExecutor(max_workers=self.spotify_config['search_concurrency']) as executor:
+                futures = {
+                    executor.submit(self._search_spotify_api, songs[i]['tunegenie_id'], songs[i]['artist'], songs[i]['title']): i
+                    for i in misses
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    # One failed or malformed response must not abort every other search
+                    try:
+                        uris[i] = future.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.error("  ✗ Error searching for %s - %s: %s", songs[i]['artist'], songs[i]['title'], e)
+                        failed.add(i)
+                    except (KeyError, IndexError, TypeError, ValueError) as e:
+                        logger.error("  ✗ Unexpected search response for %s - %s: %r",
+                                     songs[i]['artist'], songs[i]['title'], e)
+                        failed.add(i)
+
+        # One summary line instead of a warning per song; searches that errored are not "not found"
+        not_found = [f"{song['artist']} - {song['title']}"
+                     for i, (song, uri) in enumerate(zip(songs, uris)) if not uri and i not in failed]
+        if not_found:
+            logger.warning("⚠ %s tracks not found on Spotify: %s", len(not_found), '; '.join(not_found))
+        if failed:
+            logger.warning("⚠ %s searches failed and will be retried next run", len(failed))
+
+        return uris
+
+    def validate_track_uris(self, uris: List[str]) -> Set[str]:
+        """Return the subset of track URIs that still exist on Spotify and are playable in the account's country.
+
+        Looks the tracks up TRACKS_LOOKUP_BATCH_SIZE at a time; if a lookup fails or its
+        response is malformed, the whole batch is assumed valid rather than discarding good
+        cache entries.
+        """
+        valid_uris = set()
+        unique_uris = list(dict.fromkeys(uris))
+        for i in range(0, len(unique_uris), TRACKS_LOOKUP_BATCH_SIZE):
+            batch = unique_uris[i:i + TRACKS_LOOKUP_BATCH_SIZE]
+            try:
+                response = self._spotify_request(
+                    "GET",
+                    "https://api.spotify.com/v1/tracks",
+                    params={
+                        "ids": ",".join(uri.rsplit(":", 1)[-1] for uri in batch),
+                        "market": "from_token"
+                    }
+                )
+                response.raise_for_status()
+                # Unknown IDs come back as null entries in request order; with a market,
+                # tracks no longer available in the account's country are flagged unplayable
+                valid_uris.update(uri for uri, track in zip(batch, response.json()["tracks"])
+                                  if track and track.get("is_playable", True))
+            except requests.exceptions.RequestException as e:
+                logger.warning("  ⚠ Could not validate cached tracks: %s", e)
+                valid_uris.update(batch)
+            except (AttributeError, KeyError, IndexError, TypeError, ValueError) as e:
+                # A malformed lookup response must not abort the run before any search happens
+                logger.warning("  ⚠ Unexpected response validating cached tracks: %r", e)
+                valid_uris.update(batch)
 
-        # Check cache first
-        cached_uri = self.cache_db.get_cached_track_search(tunegenie_id)
-        if cached_uri:
-            print(f"  ✓ Cache hit: {artist} - {title}")
-            return cached_uri
+        return valid_uris
 
-        # Cache miss - perform Spotify search
-        query = f"artist:{artist} track:{title}"
+    def _search_spotify_api(self, tunegenie_id: str, artist: str, title: str) -> Optional[str]:
+        """Query the Spotify search API for a track and queue the result for the cache.
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }
+        Returns None if Spotify has no match; raises requests.exceptions.RequestException
+        if the search itself fails (nothing is cached then, so it is retried next run).
+        """
+        query = f"artist:{artist} track:{title}"
 
         params = {
             "q": query,
             "type": "track",
-            "limit": 1
+            "limit": 1,
+            # Only match releases playable in the account's country
+            "market": "from_token"
         }
 
-        try:
-            response = requests.get(
-                "https://api.spotify.com/v1/search",
-                headers=headers,
-                params=params
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            if data["tracks"]["items"]:
-                track = data["tracks"]["items"][0]
-                spotify_uri = track["uri"]
-
-                # Cache the successful result
-                self.cache_db.cache_track_search(
-                    tunegenie_id=tunegenie_id,
-                    tunegenie_artist=artist,
-                    tunegenie_title=title,
-                    spotify_uri=spotify_uri,
-                    spotify_artist=track["artists"][0]["name"] if track["artists"] else None,
-                    spotify_title=track["name"],
-                    spotify_album=track["album"]["name"] if track["album"] else None
-                )
-
-                print(f"  ✓ Found: {artist} - {title}")
-                return spotify_uri
-            else:
-                # Cache the failed search to avoid repeating it
-                self.cache_db.cache_track_search(
-                    tunegenie_id=tunegenie_id,
-                    tunegenie_artist=artist,
-                    tunegenie_title=title,
-                    spotify_uri=None
-                )
-                print(f"  ⚠ Track not found on Spotify: {artist} - {title}")
-                return None
-
-        except requests.exceptions.RequestException as e:
-            print(f"  ✗ Error searching for track: {e}")
+        response = self._spotify_request(
+            "GET",
+            "https://api.spotify.com/v1/search",
+            params=params
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        if data["tracks"]["items"]:
+            track = data["tracks"]["items"][0]
+            spotify_uri = track["uri"]
+
+            # Queue the successful result for the cache
+            self.pending_track_cache.append((
+                tunegenie_id,
+                artist,
+                title,
+                spotify_uri,
+                track["artists"][0]["name"] if track["artists"] else None,
+                track["name"],
+                track["album"]["name"] if track["album"] else None
+            ))
+
+            logger.debug("  ✓ Found: %s - %s", artist, title)
+            return spotify_uri
+        else:
+            # Queue the failed search so it is recorded in the cache
+            self.pending_track_cache.append((tunegenie_id, artist, title, None, None, None, None))
+            logger.debug("  ⚠ Track not found on Spotify: %s - %s", artist, title)
             return None
 
-    def clear_playlist(self) -> bool:
-        """Remove all tracks from the playlist."""
-        if not self.access_token:
-            return False
+    def flush_track_cache(self):
+        """Write all queued search results to the cache in one transaction."""
+        if self.pending_track_cache:
+            self.cache_db.cache_track_searches(self.pending_track_cache)
+            self.pending_track_cache = []
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }
-
-        # Get all tracks in the playlist using pagination
-        all_track_uris = []
-        offset = 0
-        limit = 50  # Maximum allowed by Spotify API for get tracks
-        has_more_pages = True
-
-        try:
-            while has_more_pages:
-                response = requests.get(
-                    f"https://api.spotify.com/v1/playlists/{self.spotify_config['daily_playlist_id']}/tracks",
-                    headers=headers,
-                    params={
-                        "fields": "items(track(uri)),next,total",
-                        "limit": limit,
-                        "offset": offset
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
+    def _fetch_playlist_items(self, playlist_id: str, fields: str) -> List[Dict]:
+        """Fetch every item of a playlist, requesting the pages after the first one concurrently.
 
-                # Extract track URIs from current batch
-                batch_uris = [{"uri": item["track"]["uri"]} for item in data["items"] if item["track"]]
-                all_track_uris.extend(batch_uris)
+        Raises requests.exceptions.RequestException if any page fails.
+        """
+        url = f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks"
 
-                # Check if there are more pages using the "next" field from Spotify API
-                has_more_pages = data.get("next") is not None
-                offset += limit
-
-            if not all_track_uris:
-                print("✓ Playlist is already empty")
-                return True
-
-            print(f"Found {len(all_track_uris)} tracks to remove from playlist")
+        def fetch_page(offset: int) -> Dict:
+            response = self._spotify_request(
+                "GET",
+                url,
+                params={
+                    "fields": f"{fields},total",
+                    "limit": PLAYLIST_PAGE_SIZE,
+                    "offset": offset
+                }
+            )
+            response.raise_for_status()
+            return response.json()
 
-            # Remove tracks in batches (Spotify API limits to 100 tracks per delete request)
-            for i in range(0, len(all_track_uris), 100):
-                batch = all_track_uris[i:i+100]
+        first_page = fetch_page(0)
+        items = first_page["items"]
 
-                response = requests.delete(
-                    f"https://api.spotify.com/v1/playlists/{self.spotify_config['daily_playlist_id']}/tracks",
-                    headers=headers,
-                    json={"tracks": batch}
-                )
-                response.raise_for_status()
-                print(f"✓ Cleared {len(batch)} tracks from playlist")
+        # The total from the first page gives every remaining offset up front
+        offsets = range(PLAYLIST_PAGE_SIZE, first_page["total"], PLAYLIST_PAGE_SIZE)
+        if offsets:
+            with ThreadPoolExecutor(max_workers=self.spotify_config['search_concurrency']) as executor:
+                for page in executor.map(fetch_page, offsets):
+                    items.extend(page["items"])
 
-            print(f"✓ Successfully cleared all {len(all_track_uris)} tracks from playlist")
-            return True
+        return items
 
-        except requests.exceptions.RequestException as e:
-            print(f"✗ Failed to clear playlist: {e}")
-            if hasattr(e.response, 'text'):
-                print(f"Response: {e.response.text}")
-            return False
+    def get_playlist_state(self, playlist_id: str) -> Tuple[int, Optional[str]]:
+        """Get the actual number of tracks in a Spotify playlist and its snapshot ID (without syncing all tracks).
 
-    def get_actual_playlist_size(self, playlist_id: str) -> int:
-        """Get the actual number of tracks in a Spotify playlist (without syncing all tracks)."""
+        The snapshot ID changes whenever the playlist is modified; it is None if the request fails.
+        """
         if not self.access_token or not playlist_id:
-            return 0
-
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }
+            return 0, None
 
         try:
-            response = requests.get(
-                f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
-                headers=headers,
-                params={
-                    "fields": "total",
-                    "limit": 1
-                }
+            response = self._spotify_request(
+                "GET",
+                f"https://api.spotify.com/v1/playlists/{playlist_id}",
+                params={"fields": "snapshot_id,tracks(total)"}
             )
             response.raise_for_status()
             data = response.json()
-            return data.get("total", 0)
+            return data["tracks"]["total"], data.get("snapshot_id")
 
         except requests.exceptions.RequestException as e:
-            print(f"⚠ Failed to get playlist size: {e}")
-            return 0
+            logger.warning("⚠ Failed to get playlist size: %s", e)
+            return 0, None
 
-    def sync_playlist_cache(self, playlist_id: str, playlist_name: str, playlist_type: str):
-        """Sync playlist contents with cache."""
+    def sync_playlist_cache(self, playlist_id: str, playlist_name: str, playlist_type: str,
+                            snapshot_id: Optional[str] = None) -> bool:
+        """Sync playlist contents with cache.
+
+        snapshot_id (the playlist version being synced) is recorded only if every track on the
+        playlist could be cached, so a matching snapshot later means the cache mirrors the playlist.
+        """
         if not self.access_token or not playlist_id:
-            return
+            return False
 
-        print(f"Syncing {playlist_name} playlist cache...")
+        logger.info("Syncing %s playlist cache...", playlist_name)
 
         # Add/update playlist in cache
         self.cache_db.add_or_update_playlist(playlist_id, playlist_name, playlist_type)
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}"
-        }
-
-        all_track_data = []  # Store (uri, added_at) tuples
-        offset = 0
-        limit = 50  # Maximum allowed by Spotify API for get tracks
-        has_more_pages = True
-
         try:
-            while has_more_pages:
-                response = requests.get(
-                    f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
-                    headers=headers,
-                    params={
-                        "fields": "items(track(uri,name,artists,album),added_at),next,total",
-                        "limit": limit,
-                        "offset": offset
-                    }
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                # Extract track URIs and added_at timestamps from current batch
-                for item in data["items"]:
-                    if item["track"]:
-                        all_track_data.append((
-                            item["track"]["uri"],
-                            item.get("added_at")  # This is the Spotify-provided timestamp
-                        ))
+            items = self._fetch_playlist_items(playlist_id, "items(added_at,track(uri))")
 
-                # Check if there are more pages using the "next" field from Spotify API
-                has_more_pages = data.get("next") is not None
-                offset += limit
+            # Store (uri, added_at) tuples; added_at is the Spotify-provided timestamp
+            all_track_data = [(item["track"]["uri"], item.get("added_at")) for item in items if item["track"]]
 
             # Update cache with current playlist contents including timestamps
-            self.cache_db.update_playlist_tracks_with_timestamps(playlist_id, all_track_data)
-            print(f"✓ Synced {len(all_track_data)} tracks in {playlist_name} playlist cache")
+            complete = self.cache_db.update_playlist_tracks_with_timestamps(playlist_id, all_track_data)
+            if snapshot_id and not complete:
+                logger.warning("⚠ Could not cache every track in %s playlist, it will be synced again next run",
+                               playlist_name)
+            self.cache_db.set_playlist_snapshot_id(playlist_id, snapshot_id if complete else None)
+            logger.info("✓ Synced %s tracks in %s playlist cache", len(all_track_data), playlist_name)
+            return True
 
         except requests.exceptions.RequestException as e:
-            print(f"⚠ Failed to sync {playlist_name} playlist cache: {e}")
+            logger.warning("⚠ Failed to sync %s playlist cache: %s", playlist_name, e)
+            return False
 
-    def get_existing_tracks_from_cumulative_playlist(self) -> Set[str]:
-        """Get all existing track URIs from the cumulative playlist cache."""
-        if not self.spotify_config['cumulative_playlist_id']:
-            return set()
+    def get_new_tracks_for_cumulative_playlist(self, track_uris: List[str]) -> List[str]:
+        """Get the track URIs not yet in the cumulative playlist cache, in their original order.
 
-        # Try to get from cache first
-        cached_tracks = self.cache_db.get_playlist_tracks(self.spotify_config['cumulative_playlist_id'])
+        The cache must already be synced (add_new_tracks_to_cumulative_playlist does that first).
+        """
+        playlist_id = self.spotify_config['cumulative_playlist_id']
+        if not playlist_id:
+            return list(track_uris)
 
-        if cached_tracks:
-            print(f"✓ Found {len(cached_tracks)} existing tracks in cumulative playlist (from cache)")
-            return cached_tracks
-        else:
-            # Cache miss - sync from Spotify and return
-            self.sync_playlist_cache(
-                self.spotify_config['cumulative_playlist_id'],
-                "Cumulative",
-                "cumulative"
+        # The filter runs in SQLite so the whole cumulative playlist never has to be loaded
+        return self.cache_db.filter_new_uris(playlist_id, track_uris)
+
+    def replace_playlist_tracks(self, track_uris: List[str]) -> bool:
+        """Replace the daily playlist contents with the given tracks.
+
+        A single PUT swaps in the first 100 tracks (the API maximum per request); any
+        remaining tracks are appended, so no existing tracks need to be fetched or deleted.
+        """
+        if not self.access_token:
+            return False
+
+        try:
+            response = self._spotify_request(
+                "PUT",
+                f"https://api.spotify.com/v1/playlists/{self.spotify_config['daily_playlist_id']}/tracks",
+                json={"uris": track_uris[:100]}
             )
-            return self.cache_db.get_playlist_tracks(self.spotify_config['cumulative_playlist_id'])
+            response.raise_for_status()
+            logger.info("✓ Replaced daily playlist contents with %s tracks", len(track_uris[:100]))
+
+        except requests.exceptions.RequestException as e:
+            logger.error("✗ Failed to replace daily playlist contents: %s", e)
+            if hasattr(e.response, 'text'):
+                logger.error("Response: %s", e.response.text)
+            return False
+
+        return len(track_uris) <= 100 or self.add_tracks_to_playlist(track_uris[100:], "daily")
 
     def add_tracks_to_playlist(self, track_uris: List[str], playlist_type: str = "daily") -> bool:
         """Add tracks to the specified playlist."""
@@ -360,33 +594,28 @@ class SpotifyUpdater:
             playlist_id = self.spotify_config['cumulative_playlist_id']
             playlist_name = "cumulative"
         else:
-            print(f"✗ Unknown playlist type: {playlist_type}")
+            logger.error("✗ Unknown playlist type: %s", playlist_type)
             return False
 
         if not playlist_id:
-            print(f"⚠ No {playlist_name} playlist ID configured, skipping")
+            logger.warning("⚠ No %s playlist ID configured, skipping", playlist_name)
             return True
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-
         # Spotify API limits to 100 tracks per request
         for i in range(0, len(track_uris), 100):
             batch = track_uris[i:i+100]
 
             try:
-                response = requests.post(
+                response = self._spotify_request(
+                    "POST",
                     f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
-                    headers=headers,
                     json={"uris": batch}
                 )
                 response.raise_for_status()
-                print(f"✓ Added {len(batch)} tracks to {playlist_name} playlist")
+                logger.info("✓ Added %s tracks to %s playlist", len(batch), playlist_name)
 
             except requests.exceptions.RequestException as e:
-                print(f"✗ Failed to add tracks to {playlist_name} playlist: {e}")
+                logger.error("✗ Failed to add tracks to %s playlist: %s", playlist_name, e)
                 return False
 
         return True
@@ -394,86 +623,94 @@ class SpotifyUpdater:
     def add_new_tracks_to_cumulative_playlist(self, track_uris: List[str]) -> bool:
         """Add only new tracks to the cumulative playlist."""
         if not self.spotify_config['cumulative_playlist_id']:
-            print("⚠ No cumulative playlist configured, skipping")
+            logger.warning("⚠ No cumulative playlist configured, skipping")
             return True
 
-        print("\nProcessing cumulative playlist...")
+        logger.info("Processing cumulative playlist...")
+
+        playlist_id = self.spotify_config['cumulative_playlist_id']
 
         # Get the ACTUAL current size from Spotify before any operations
-        actual_current_count = self.get_actual_playlist_size(self.spotify_config['cumulative_playlist_id'])
+        actual_current_count, snapshot_id = self.get_playlist_state(playlist_id)
         max_tracks = self.spotify_config['max_cumulative_tracks']
 
-        print(f"Actual playlist size from Spotify: {actual_current_count} tracks (max: {max_tracks})")
+        logger.info("Actual playlist size from Spotify: %s tracks (max: %s)", actual_current_count, max_tracks)
 
-        # Force a fresh sync to ensure cache is up-to-date before any operations
-        self.sync_playlist_cache(
-            self.spotify_config['cumulative_playlist_id'],
-            "Cumulative",
-            "cumulative"
-        )
+        # Only download the whole playlist if it changed since the cache last matched it
+        if snapshot_id and snapshot_id == self.cache_db.get_playlist_snapshot_id(playlist_id):
+            logger.info("✓ Cumulative playlist unchanged since last update, skipping sync")
+        else:
+            self.sync_playlist_cache(playlist_id, "Cumulative", "cumulative", snapshot_id)
 
-        existing_tracks = self.get_existing_tracks_from_cumulative_playlist()
+        # The snapshot is only on record if the cache holds every track on the playlist
+        cache_complete = snapshot_id is not None and snapshot_id == self.cache_db.get_playlist_snapshot_id(playlist_id)
 
         # Calculate how many tracks we'll have after adding new ones
-        new_tracks = [uri for uri in track_uris if uri not in existing_tracks]
+        new_tracks = self.get_new_tracks_for_cumulative_playlist(track_uris)
         projected_count = actual_current_count + len(new_tracks)
 
-        print(f"New tracks to add: {len(new_tracks)}, Projected: {projected_count} tracks")
+        logger.info("New tracks to add: %s, Projected: %s tracks", len(new_tracks), projected_count)
 
         # Trim preemptively if we'll exceed the limit (or if already over)
         if projected_count > max_tracks or actual_current_count > max_tracks:
+            # The playlist is about to change, so the recorded snapshot no longer applies
+            self.cache_db.set_playlist_snapshot_id(playlist_id, None)
+
             # If we're already over, trim down to max, then remove more for the new tracks
             if actual_current_count > max_tracks:
                 tracks_to_remove_count = actual_current_count - max_tracks + len(new_tracks) + 50
             else:
                 tracks_to_remove_count = projected_count - max_tracks + 50
 
-            print(f"Preemptively trimming {tracks_to_remove_count} oldest tracks to make room...")
+            logger.info("Preemptively trimming %s oldest tracks to make room...", tracks_to_remove_count)
 
             if not self.trim_cumulative_playlist(tracks_to_remove_count):
-                print("✗ Failed to trim playlist before adding new tracks")
+                logger.error("✗ Failed to trim playlist before adding new tracks")
                 return False
 
-            # Refresh the existing tracks after trimming
-            existing_tracks = self.get_existing_tracks_from_cumulative_playlist()
-            new_tracks = [uri for uri in track_uris if uri not in existing_tracks]
+            # Trimming may have removed some of the tracks we were about to skip
+            new_tracks = self.get_new_tracks_for_cumulative_playlist(track_uris)
 
         if not new_tracks:
-            print("✓ All tracks already exist in cumulative playlist")
+            logger.info("✓ All tracks already exist in cumulative playlist")
             return True
 
-        print(f"Adding {len(new_tracks)} new tracks to cumulative playlist...")
+        logger.info("Adding %s new tracks to cumulative playlist...", len(new_tracks))
 
         # Add tracks in smaller batches with better error handling for cumulative playlist
-        success = self.add_tracks_to_cumulative_playlist_batched(new_tracks)
+        self.cache_db.set_playlist_snapshot_id(playlist_id, None)
+        added_tracks = self.add_tracks_to_cumulative_playlist_batched(new_tracks)
+
+        if added_tracks:
+            # Append only the tracks that were actually added; the cached ones keep their timestamps
+            self.cache_db.add_uris_to_playlist_cache(playlist_id, added_tracks)
 
-        if success:
-            # Update cache with new tracks
-            updated_tracks = existing_tracks | set(new_tracks)
-            self.cache_db.update_playlist_tracks(self.spotify_config['cumulative_playlist_id'], list(updated_tracks))
+            # Cache and playlist match again only if the cache was complete and every batch went through
+            if cache_complete and len(added_tracks) == len(new_tracks):
+                self.cache_db.set_playlist_snapshot_id(playlist_id, self.get_playlist_state(playlist_id)[1])
 
-        return success
+        return bool(added_tracks)
 
-    def add_tracks_to_cumulative_playlist_batched(self, track_uris: List[str]) -> bool:
-        """Add tracks to cumulative playlist with enhanced error handling and smaller batches."""
+    def add_tracks_to_cumulative_playlist_batched(self, track_uris: List[str]) -> List[str]:
+        """Add tracks to cumulative playlist with enhanced error handling and smaller batches.
+
+        Returns the URIs that were actually added (empty if every batch failed).
+        """
         if not self.access_token or not track_uris:
-            return False
+            return []
 
         playlist_id = self.spotify_config['cumulative_playlist_id']
         if not playlist_id:
-            print("⚠ No cumulative playlist ID configured")
-            return False
-
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
+            logger.warning("⚠ No cumulative playlist ID configured")
+            return []
 
         # Use smaller batch size for cumulative playlist to avoid issues
         batch_size = 50  # Reduced from 100 to be more conservative
-        total_added = 0
+        added_uris = []
         failed_batches = 0
 
+        # Batches go out one at a time, in order: concurrent writes to the same playlist
+        # race on its snapshot and can land out of order
         for i in range(0, len(track_uris), batch_size):
             batch = track_uris[i:i + batch_size]
             batch_number = (i // batch_size) + 1
@@ -481,71 +718,66 @@ class SpotifyUpdater:
             # Validate URIs in this batch
             valid_uris = [uri for uri in batch if uri and uri.startswith('spotify:track:')]
             if len(valid_uris) != len(batch):
-                print(f"⚠ Batch {batch_number}: Filtered out {len(batch) - len(valid_uris)} invalid URIs")
+                logger.warning("⚠ Batch %s: Filtered out %s invalid URIs", batch_number, len(batch) - len(valid_uris))
 
             if not valid_uris:
-                print(f"⚠ Batch {batch_number}: No valid URIs to add")
+                logger.warning("⚠ Batch %s: No valid URIs to add", batch_number)
                 continue
 
             try:
-                response = requests.post(
+                response = self._spotify_request(
+                    "POST",
                     f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
-                    headers=headers,
                     json={"uris": valid_uris}
                 )
 
                 if response.status_code == 200 or response.status_code == 201:
-                    total_added += len(valid_uris)
-                    print(f"✓ Added {len(valid_uris)} tracks to cumulative playlist (batch {batch_number})")
+                    added_uris.extend(valid_uris)
+                    logger.info("✓ Added %s tracks to cumulative playlist (batch %s)", len(valid_uris), batch_number)
                 else:
-                    print(f"✗ Failed to add batch {batch_number}: HTTP {response.status_code}")
-                    print(f"Response: {response.text}")
+                    logger.error("✗ Failed to add batch %s: HTTP %s", batch_number, response.status_code)
+                    logger.error("Response: %s", response.text)
                     failed_batches += 1
 
                     # Continue with next batch instead of failing completely
                     continue
 
             except requests.exceptions.RequestException as e:
-                print(f"✗ Error adding batch {batch_number} to cumulative playlist: {e}")
+                logger.error("✗ Error adding batch %s to cumulative playlist: %s", batch_number, e)
                 failed_batches += 1
                 continue
 
         # Consider success if at least some batches worked
-        if total_added > 0:
-            print(f"✓ Successfully added {total_added} tracks to cumulative playlist")
+        if added_uris:
+            logger.info("✓ Successfully added %s tracks to cumulative playlist", len(added_uris))
             if failed_batches > 0:
-                print(f"⚠ {failed_batches} batches failed, but partial success achieved")
-            return True
+                logger.warning("⚠ %s batches failed, but partial success achieved", failed_batches)
         else:
-            print(f"✗ Failed to add any tracks to cumulative playlist ({failed_batches} batches failed)")
-            return False
+            logger.error("✗ Failed to add any tracks to cumulative playlist (%s batches failed)", failed_batches)
+        return added_uris
 
     def remove_tracks_from_playlist(self, playlist_id: str, track_uris: List[str]) -> bool:
         """Remove tracks from a Spotify playlist."""
         if not self.access_token or not track_uris or not playlist_id:
             return False
 
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-
-        # Remove tracks in batches (Spotify API limits to 100 tracks per delete request)
+        # Remove tracks in batches (Spotify API limits to 100 tracks per delete request),
+        # sequentially so the requests don't race on the playlist's snapshot
         for i in range(0, len(track_uris), 100):
             batch = track_uris[i:i + 100]
             tracks_to_remove = [{"uri": uri} for uri in batch]
 
             try:
-                response = requests.delete(
+                response = self._spotify_request(
+                    "DELETE",
                     f"https://api.spotify.com/v1/playlists/{playlist_id}/tracks",
-                    headers=headers,
                     json={"tracks": tracks_to_remove}
                 )
                 response.raise_for_status()
-                print(f"✓ Removed {len(batch)} tracks from cumulative playlist")
+                logger.info("✓ Removed %s tracks from cumulative playlist", len(batch))
 
             except requests.exceptions.RequestException as e:
-                print(f"✗ Failed to remove batch of tracks from cumulative playlist: {e}")
+                logger.error("✗ Failed to remove batch of tracks from cumulative playlist: %s", e)
                 return False
 
         return True
@@ -560,23 +792,23 @@ class SpotifyUpdater:
         if tracks_to_remove_count <= 0:
             return True
 
-        print(f"Trimming {tracks_to_remove_count} oldest tracks from cumulative playlist...")
+        logger.info("Trimming %s oldest tracks from cumulative playlist...", tracks_to_remove_count)
 
         # Get the oldest tracks
         oldest_track_uris = self.cache_db.get_oldest_tracks_from_playlist(playlist_id, tracks_to_remove_count)
 
         if not oldest_track_uris:
-            print("⚠ No tracks found to remove (possible cache issue)")
+            logger.warning("⚠ No tracks found to remove (possible cache issue)")
             return True
 
         # Remove from Spotify
         if self.remove_tracks_from_playlist(playlist_id, oldest_track_uris):
             # Remove from cache
             self.cache_db.remove_tracks_from_playlist_cache(playlist_id, oldest_track_uris)
-            print(f"✓ Successfully trimmed {len(oldest_track_uris)} tracks from cumulative playlist")
+            logger.info("✓ Successfully trimmed %s tracks from cumulative playlist", len(oldest_track_uris))
             return True
         else:
-            print("✗ Failed to trim cumulative playlist")
+            logger.error("✗ Failed to trim cumulative playlist")
             return False
 
     def initialize_cache(self):
@@ -585,7 +817,7 @@ class SpotifyUpdater:
 
         # If this is the first run (no playlists in cache), populate cache
         if cache_stats['playlist_count'] == 0:
-            print("\nInitializing cache with current playlist contents...")
+            logger.info("Initializing cache with current playlist contents...")
 
             # Sync daily playlist
             if self.spotify_config['daily_playlist_id']:
@@ -603,83 +835,75 @@ class SpotifyUpdater:
                     "cumulative"
                 )
 
-            print("✓ Cache initialization complete")
+            logger.info("✓ Cache initialization complete")
 
     def run(self):
         """Main execution flow."""
-        print("=" * 50)
-        print("Starting Daily Spotify Playlist Update")
-        print("=" * 50)
-
-        # Step 1: Refresh Spotify token
-        if not self.refresh_spotify_token():
-            print("\nFailed to authenticate with Spotify.")
-            print("Make sure you have set SPOTIFY_REFRESH_TOKEN correctly.")
-            print("Run with --setup to get a new refresh token.")
-            sys.exit(1)
+        logger.info("=" * 50)
+        logger.info("Starting Daily Spotify Playlist Update")
+        logger.info("=" * 50)
+
+        # TuneGenie doesn't need the Spotify token, so fetch the songs (step 2) in the background
+        # while authenticating and initializing the cache
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            songs_future = executor.submit(self.fetch_tunegenie_songs)
+
+            # Step 1: Refresh Spotify token
+            if not self.refresh_spotify_token():
+                logger.error("Failed to authenticate with Spotify.")
+                logger.error("Make sure you have set SPOTIFY_REFRESH_TOKEN correctly.")
+                logger.error("Run with --setup to get a new refresh token.")
+                sys.exit(1)
+
+            # Step 1.5: Initialize cache with current playlist contents if needed
+            self.initialize_cache()
 
-        # Step 1.5: Initialize cache with current playlist contents if needed
-        self.initialize_cache()
+            # Step 2: Collect the songs fetched from TuneGenie
+            songs = songs_future.result()
 
-        # Step 2: Fetch songs from TuneGenie
-        songs = self.fetch_tunegenie_songs()
         if not songs:
-            print("No songs found. Exiting.")
+            logger.info("No songs found. Exiting.")
             sys.exit(0)
 
         # Step 3: Search for tracks on Spotify (with caching)
-        print("\nSearching for tracks on Spotify...")
-        track_uris = []
-        unique_tracks = {}  # Use dict to track unique songs
-        tunegenie_ids = []  # Track TuneGenie IDs for cache updates
+        # Expire old failed searches first so those songs get another chance on Spotify today
+        expired = self.cache_db.cleanup_old_data(days=FAILED_SEARCH_TTL_DAYS)
+        if expired:
+            logger.info("Expired %s old failed searches from the cache", expired)
 
-        for song in songs:
-            # Create a unique key for each song
-            key = f"{song['artist'].lower()}_{song['title'].lower()}"
+        logger.info("Searching for tracks on Spotify...")
+        track_uris = [uri for uri in self.search_spotify_tracks(songs) if uri]
 
-            # Skip if we've already processed this song in this batch
-            if key in unique_tracks:
-                continue
-
-            uri = self.search_spotify_track(song['tunegenie_id'], song['artist'], song['title'])
-            if uri:
-                unique_tracks[key] = uri
-                track_uris.append(uri)
-                tunegenie_ids.append(song['tunegenie_id'])
+        self.flush_track_cache()
 
-        print(f"\n✓ Found {len(track_uris)} unique tracks on Spotify")
+        logger.info("✓ Found %s unique tracks on Spotify", len(track_uris))
 
         # Display cache statistics
         cache_stats = self.cache_db.get_cache_stats()
-        print(f"Cache stats: {cache_stats['successful_searches']}/{cache_stats['total_searches']} successful searches cached")
+        logger.info("Cache stats: %s/%s successful searches cached",
+                    cache_stats['successful_searches'], cache_stats['total_searches'])
 
         if not track_uris:
-            print("No tracks found on Spotify. Exiting.")
+            logger.warning("No tracks found on Spotify. Exiting.")
             sys.exit(0)
 
-        # Step 4: Clear existing daily playlist
-        print("\nClearing existing daily playlist...")
-        if not self.clear_playlist():
-            print("Failed to clear daily playlist. Exiting.")
-            sys.exit(1)
-
-        # Step 5: Add new tracks to daily playlist
-        print("\nAdding new tracks to daily playlist...")
-        if not self.add_tracks_to_playlist(track_uris, "daily"):
-            print("\n✗ Failed to update daily playlist")
+        # Step 4: Replace the daily playlist contents with yesterday's tracks
+        logger.info("Replacing daily playlist contents...")
+        if not self.replace_playlist_tracks(track_uris):
+            logger.error("✗ Failed to update daily playlist")
             sys.exit(1)
 
         # Update daily playlist cache
         self.cache_db.update_playlist_tracks(self.spotify_config['daily_playlist_id'], track_uris)
 
-        # Step 6: Add new tracks to cumulative playlist (only if they don't already exist)
+        # Step 5: Add new tracks to cumulative playlist (only if they don't already exist)
         if not self.add_new_tracks_to_cumulative_playlist(track_uris):
-            print("\n✗ Failed to update cumulative playlist")
+            logger.error("✗ Failed to update cumulative playlist")
             sys.exit(1)
 
-        print(f"\n✓ Successfully updated playlists with {len(track_uris)} unique tracks!")
+        logger.info("✓ Successfully updated playlists with %s unique tracks!", len(track_uris))
 
         # Show final cache statistics
         final_stats = self.cache_db.get_cache_stats()
-        print(f"Final cache stats: {final_stats['successful_searches']} successful searches, "
-              f"{final_stats['playlist_track_count']} total playlist entries")
\ No newline at end of file
+        logger.info("Final cache stats: %s successful searches, %s total playlist entries",
+                    final_stats['successful_searches'], final_stats['playlist_track_count'])
\ No newline at end of file